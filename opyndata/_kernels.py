@@ -0,0 +1,72 @@
+"""
+##############################################
+Numerical kernels
+##############################################
+Fused numerical routines used by the dashboard.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import scipy.fft
+
+
+def welch_psd(y, fs, window, nfft=None, workers=None):
+    """
+    One-sided Welch PSD with 50% overlap and linear detrending of each segment,
+    equivalent to scipy.signal.welch(y, fs, window=window, nfft=nfft, detrend='linear')
+
+    Arguments
+    ---------------------------
+    y : float
+        1d numpy array with time series (float32 input is processed in single precision, 
+        other types in double precision)
+    fs : float
+        sampling frequency
+    window : float
+        1d numpy array with window (its length defines the segment length)
+    nfft : int, optional
+        length of FFT (zero padding), defaults to length of window
+    workers : None, optional
+        number of threads used for the FFTs of the segments (-1 for all cores), 
+        see scipy.fft.rfft
+
+    Returns
+    ---------------------------
+    f : float
+        numpy array of frequencies
+    p : float
+        numpy array of power spectral density
+
+    """
+
+    nperseg = len(window)
+    if nfft is None:
+        nfft = nperseg
+    step = nperseg - nperseg//2
+
+    y = np.asarray(y)
+    dtype = np.float32 if y.dtype == np.float32 else np.float64
+    window = np.asarray(window, dtype=dtype)
+
+    # segments as strided view, shape (n_segments, nperseg)
+    segs = sliding_window_view(y.astype(dtype, copy=False), nperseg)[::step]
+
+    # linear detrend and windowing in one pass: w*(seg - a - b*tc), where tc is centered time
+    tc = (np.arange(nperseg) - (nperseg-1)/2).astype(dtype)
+    a = segs.mean(axis=1)
+    b = (segs @ tc) / (tc @ tc)
+    windowed = segs*window - a[:, None]*window - b[:, None]*(tc*window)
+
+    p = scipy.fft.rfft(windowed, n=nfft, axis=1, workers=workers)
+    p = p.real**2 + p.imag**2
+    p = p.mean(axis=0) / (fs * (window @ window))
+
+    # one-sided spectrum: double all but DC (and Nyquist for even nfft)
+    if nfft % 2:
+        p[1:] *= 2
+    else:
+        p[1:-1] *= 2
+
+    f = scipy.fft.rfftfreq(nfft, 1/fs)
+
+    return f, p
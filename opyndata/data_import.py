@@ -8,11 +8,70 @@ All functions related to data import
 import numpy as np
 import scipy.io as sio
 from collections import namedtuple
+from collections.abc import Mapping
 import pandas as pd
-from .misc import create_sensor_dict
+from .misc import create_sensor_dict, time_axis_from_duration
 import h5py
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+Recording = namedtuple('Recording', ['data', 'columns', 't', 'samplerate'])
 
 # ------------------------ HDF export functions ----------------------------
+def open_recording(fname, rdcc_nbytes=64*1024**2, rdcc_nslots=10007, mode='r', 
+                   mdc_nbytes=None, **kwargs):
+    """
+    Open h5 file with a larger raw data chunk cache than h5py's default. HDF5 gives 
+    each open (chunked) dataset its own chunk cache with these settings, not the file.
+        
+    Arguments
+    ---------------------------
+    fname : str
+        path to h5-file
+    rdcc_nbytes : 64*1024**2, optional
+        size of the raw data chunk cache of each dataset in bytes - should be at least 
+        the size of the chunks of a dataset that are read repeatedly (memory is only 
+        used by chunks actually read, for as long as the dataset is open)
+    rdcc_nslots : 10007, optional
+        number of chunk slots in the cache hash table of each dataset (preferably a 
+        prime number) - the table is allocated when a dataset is opened, so large 
+        values cost memory for every open dataset
+    mode : 'r', optional
+        file mode passed to h5py
+    mdc_nbytes : None, optional
+        initial size of the metadata cache in bytes (max. 128 MiB) - a larger cache 
+        (kept longer before eviction) speeds up traversal of files with many groups; 
+        HDF5 defaults are used if None
+    **kwargs
+        additional keyword arguments passed to h5py.File
+
+    Returns
+    ---------------------------
+    hf : obj
+        h5py file object (or zarr group, if fname is a .zarr store - cache settings are then ignored)
+    """
+    
+    if str(fname).endswith('.zarr'):
+        try:
+            import zarr
+        except ImportError:
+            raise ImportError('zarr is required to open .zarr stores')
+        return zarr.open_group(fname, mode=mode)
+    
+    hf = h5py.File(fname, mode, rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots, **kwargs)
+
+    if mdc_nbytes is not None:
+        config = hf.id.get_mdc_config()
+        config.set_initial_size = True
+        config.initial_size = mdc_nbytes
+        config.max_size = max(config.max_size, mdc_nbytes)
+        config.min_size = min(config.min_size, mdc_nbytes)
+        config.epochs_before_eviction = 10      # maximum allowed by HDF5
+        hf.id.set_mdc_config(config)
+
+    return hf
+
 def get_all_comp(obj):
     """
     Get all components (datasets) from h5py object.
@@ -29,16 +88,370 @@ def get_all_comp(obj):
 
     """
 
-    keys = ()
+    keys = []
+    if isinstance(obj, h5py.Group):
+        def add_key(name, value):
+            if isinstance(value, h5py.Dataset):
+                keys.append(value.name)
+
+        obj.visititems(add_key)
+
+    return tuple(keys)
+
+def memmap_dataset(dset):
+    """
+    Memory-map h5py dataset directly from file, if the storage layout allows it.
+
+    Arguments
+    ---------------------------
+    dset : obj
+        h5py dataset to map
+
+    Returns
+    ---------------------------
+    data : obj
+        copy-on-write numpy memmap of the dataset, or None if the dataset is
+        chunked (and possibly compressed), not allocated, not stored in native byte order, 
+        or if the file is open for writing (unflushed data would not be seen in the file)
+
+    """
+
+    if dset.chunks is not None or not dset.dtype.isnative or dset.file.driver != 'sec2':
+        return None
+
+    if dset.file.mode != 'r':
+        return None
+
+    offset = dset.id.get_offset()
+    if offset is None:
+        return None
+
+    return np.memmap(dset.file.filename, dtype=dset.dtype, mode='c', offset=offset, shape=dset.shape)
+
+def read_dataset(dset, decimation_factor=1, memmap=True, dtype=None):
+    """
+    Read h5py dataset into a preallocated numpy array, optionally decimated.
+
+    Arguments
+    ---------------------------
+    dset : obj
+        h5py dataset to read (first axis is the sample axis) - other array types, 
+        e.g. zarr arrays, are sliced directly
+    decimation_factor : 1, optional
+        integer defining the decimation wanted for data retrieval (every n-th sample)
+    memmap : True, optional
+        whether or not to return a view of a memory-mapped file when the dataset
+        is stored contiguously (see memmap_dataset) rather than reading it
+    dtype : None, optional
+        numpy dtype of output - HDF5 converts the data while reading, e.g. np.float32 
+        to halve memory use at the cost of precision (memory-mapping is only used if None)
+
+    Returns
+    ---------------------------
+    data : obj
+        numpy array with the (decimated) contents of the dataset
+
+    """
+
+    ds = decimation_factor
+
+    if not isinstance(dset, h5py.Dataset):
+        return np.asarray(dset[::ds], dtype=dtype)
+
+    if memmap and dtype is None:
+        mm = memmap_dataset(dset)
+        if mm is not None:
+            return mm[::ds]
+
+    n = (dset.shape[0] + ds - 1)//ds
+    if dtype is None:
+        dtype = dset.dtype
+
+    data = np.empty((n,) + dset.shape[1:], dtype=dtype)
+
+    if n == 0:
+        return data
+    elif ds == 1:
+        dset.read_direct(data)
+    else:
+        dset.read_direct(data, source_sel=np.s_[::ds])
+
+    return data
+
+def read_datasets(dsets, decimation_factor=1, dtype=None):
+    """
+    Read equally long 1d h5py datasets of the same dtype into the columns of a single 
+    preallocated numpy array.
+
+    Arguments
+    ---------------------------
+    dsets : obj
+        list of h5py datasets to read (all with the same shape and dtype, unless dtype is given)
+    decimation_factor : 1, optional
+        integer defining the decimation wanted for data retrieval (every n-th sample)
+    dtype : None, optional
+        numpy dtype of output - standard is the dtype of the datasets
+
+    Returns
+    ---------------------------
+    block : obj
+        numpy array with shape (n_samples, n_datasets), one column per dataset 
+        (Fortran-ordered, i.e., each column is contiguous in memory)
+
+    """
+
+    ds = decimation_factor
+    n = (dsets[0].shape[0] + ds - 1)//ds
+    if dtype is None:
+        dtypes = set(dset.dtype for dset in dsets)
+        if len(dtypes) > 1:
+            raise ValueError('Datasets have different dtypes - specify dtype or read them separately.')
+        dtype = dsets[0].dtype
+
+    # read each dataset into a contiguous row, returned transposed
+    block = np.empty((len(dsets), n), dtype=dtype)
+
+    if n == 0:
+        return block.T
+
+    for i, dset in enumerate(dsets):
+        if ds == 1:
+            dset.read_direct(block[i])
+        else:
+            dset.read_direct(block[i], source_sel=np.s_[::ds])
+
+    return block.T
+
+def rechunk_store(fname, chunk_length=65536, compression='lzf', max_chunk_bytes=1024**2):
+    """
+    Rewrite chunked datasets with oversized chunks in place, so that reading a slice
+    of a time series only decompresses the chunks covering that slice.
+
+    Chunked datasets where a chunk exceeds max_chunk_bytes or spans the full length of a
+    (longer than chunk_length) dataset are rewritten with chunks of chunk_length samples
+    along the first axis, fewer if needed to keep chunks within max_chunk_bytes. Datasets
+    already chunked like this are skipped, so repeated calls do not rewrite them. Empty and
+    contiguous datasets are left untouched, as the latter can be sliced
+    (and memory-mapped) directly. HDF5 does not reclaim the space of the old datasets -
+    run h5repack afterwards to shrink the file.
+
+    Arguments
+    ---------------------------
+    fname : str
+        path to h5-file (opened in append mode)
+    chunk_length : 65536, optional
+        number of samples per chunk of rewritten datasets
+    compression : 'lzf', optional
+        compression filter of rewritten datasets (passed to h5py)
+    max_chunk_bytes : 1024**2, optional
+        largest chunk size (in bytes) accepted without rewriting
+
+    Returns
+    ---------------------------
+    rechunked : str
+        tuple with names of the rewritten datasets
+
+    """
+
+    with h5py.File(fname, 'a') as hf:
+        dsets = dict()
+        def add_dset(name, obj):
+            if isinstance(obj, h5py.Dataset) and obj.chunks is not None and obj.ndim > 0 and obj.size > 0:
+                chunk_bytes = np.prod(obj.chunks) * obj.dtype.itemsize
+                full_length = obj.chunks[0] >= obj.shape[0] > chunk_length
+                
+                # samples per chunk limited by max_chunk_bytes (at least one row)
+                row_bytes = int(np.prod(obj.shape[1:])) * obj.dtype.itemsize
+                n_rows = max(min(chunk_length, obj.shape[0], max_chunk_bytes // row_bytes), 1)
+                chunks = (n_rows,) + obj.shape[1:]
+                
+                if (chunk_bytes > max_chunk_bytes or full_length) and obj.chunks != chunks:
+                    dsets[obj.name] = chunks
+
+        hf.visititems(add_dset)
+
+        for name, chunks in dsets.items():
+            old = hf[name]
+            n = old.shape[0]
+            new = hf.create_dataset(name + '.rechunk', shape=old.shape, dtype=old.dtype,
+                                    chunks=chunks, compression=compression,
+                                    maxshape=old.maxshape)
+
+            block = chunks[0]*64
+            for i0 in range(0, n, block):
+                new[i0:i0+block] = old[i0:i0+block]
+
+            for key, val in old.attrs.items():
+                new.attrs[key] = val
+
+            del hf[name]
+            hf.move(name + '.rechunk', name)
+
+    return tuple(dsets)
+
+def _json_attr(val):
+    # h5py attribute value converted to JSON-compatible type for zarr
+    if isinstance(val, bytes):
+        return val.decode()
+    elif isinstance(val, np.ndarray):
+        return [_json_attr(v) for v in val.tolist()] if val.dtype.kind in 'SO' else val.tolist()
+    elif isinstance(val, np.generic):
+        return val.item()
+    else:
+        return val
+
+def convert_to_zarr(fname, store_path=None, chunk_length=65536, clevel=3):
+    """
+    Convert h5-file to zarr store with the same group structure and attributes.
+    Zarr reads release the GIL during decompression, so that concurrent reads 
+    (e.g. dashboard callbacks) are not serialized as with h5py.
+
+    Arguments
+    ---------------------------
+    fname : str
+        path to h5-file
+    store_path : None, optional
+        path of zarr store to create - standard is fname with extension .zarr
+    chunk_length : 65536, optional
+        number of samples per chunk (along first axis) of the zarr arrays
+    clevel : 3, optional
+        compression level of Blosc/zstd compressor (bit-shuffled)
+
+    Returns
+    ---------------------------
+    store_path : str
+        path to the created zarr store (can be opened with open_recording)
+
+    """
+
+    try:
+        import zarr
+    except ImportError:
+        raise ImportError('zarr is required to convert to zarr stores')
+
+    if store_path is None:
+        store_path = os.path.splitext(fname)[0] + '.zarr'
+
+    compressor = zarr.codecs.BloscCodec(cname='zstd', clevel=clevel, shuffle='bitshuffle')
+    root = zarr.open_group(store_path, mode='w')
+
+    with h5py.File(fname, 'r') as hf:
+        root.attrs.update({key: _json_attr(val) for key, val in hf.attrs.items()})
+
+        def copy_obj(name, obj):
+            if isinstance(obj, h5py.Group):
+                new = root.create_group(name)
+            else:
+                if obj.ndim == 0:
+                    new = root.create_array(name, shape=(), dtype=obj.dtype)
+                    new[()] = obj[()]
+                else:
+                    chunks = (min(chunk_length, obj.shape[0]) or 1,) + obj.shape[1:]
+                    new = root.create_array(name, shape=obj.shape, dtype=obj.dtype,
+                                            chunks=chunks, compressors=compressor)
+                    block = chunks[0]*64
+                    for i0 in range(0, obj.shape[0], block):
+                        new[i0:i0+block] = obj[i0:i0+block]
+
+            new.attrs.update({key: _json_attr(val) for key, val in obj.attrs.items()})
+
+        hf.visititems(copy_obj)
+
+    return store_path
+
+def visit_items(obj, func):
+    """
+    Call func(name, obj) for all groups and datasets below h5py group or zarr group,
+    as h5py's visititems (names relative to obj).
+
+    Arguments
+    ---------------------------
+    obj : obj
+        h5py group/file or zarr group
+    func : function
+        function taking name and object of each member
+
+    """
+
     if isinstance(obj, h5py.Group):
-        for key, value in obj.items():
-            if isinstance(value, h5py.Group):
-                keys = keys + get_all_comp(value)
+        obj.visititems(func)
+    else:       # zarr does not keep member order - visit in h5py's order (by name, depth first)
+        members = sorted(obj.members(max_depth=None), key=lambda member: member[0].split('/'))
+        for name, member in members:
+            func(name, member)
+
+class LazyRecording(Mapping):
+    """
+    Read-only mapping from column names to h5py datasets, read on first access.
+    
+    Arguments
+    ---------------------------
+    dsets : dict
+        dictionary with keys equal the column names and values equal the h5py datasets
+    decimation_factor : 1, optional
+        integer defining the decimation wanted for data retrieval (every n-th sample)
+    duration : float, optional
+        duration of recording - if given, a time axis is available as 't'
+    dtype : None, optional
+        numpy dtype to convert data to when reading (see read_dataset)
+
+    """
+
+    def __init__(self, dsets, decimation_factor=1, duration=None, dtype=None):
+        self.dsets = dsets
+        self.decimation_factor = decimation_factor
+        self.duration = duration
+        self.dtype = dtype
+        self._cache = dict()
+        self._key_set = frozenset(self._keys())
+
+    def _keys(self):
+        keys = list(self.dsets.keys())
+        if self.duration is not None and len(keys) > 0:
+            keys.append('t')
+        return keys
+
+    def __getitem__(self, key):
+        if key not in self._cache:
+            if key == 't' and key not in self.dsets and self.duration is not None and len(self.dsets) > 0:
+                dset0 = next(iter(self.dsets.values()))
+                n = (dset0.shape[0] + self.decimation_factor - 1)//self.decimation_factor
+                self._cache[key] = time_axis_from_duration(n, self.duration)
             else:
-                keys = keys + (value.name,)
-    return keys
+                self._cache[key] = read_dataset(self.dsets[key], self.decimation_factor, dtype=self.dtype)
+        
+        return self._cache[key]
+
+    def __contains__(self, key):
+        # membership from column names - Mapping's default would read the dataset
+        return key in self._key_set
+
+    def __iter__(self):
+        return iter(self._keys())
 
-def export_from_multirec_hdf(hf, rec_names, **kwargs):
+    def __len__(self):
+        return len(self._keys())
+
+    def to_dataframe(self, columns=None):
+        """
+        Read selected columns into pandas dataframe.
+        
+        Arguments
+        ---------------------------
+        columns : str, optional
+            list of column names to include - standard is all columns
+
+        Returns
+        ---------------------------
+        df : obj
+            pandas dataframe with requested columns
+        """
+        if columns is None:
+            columns = self._keys()
+            
+        return pd.DataFrame({col: self[col] for col in columns})
+
+def export_from_multirec_hdf(hf, rec_names, n_workers=1, open_kwargs=None, **kwargs):
     """
     Export all specified recordings from h5 file with recordings as groups.
         
@@ -48,6 +461,15 @@ def export_from_multirec_hdf(hf, rec_names, **kwargs):
         object from h5py representing the h5-file with multiple recordings
     rec_names : str
         list of strings with requested recordings
+    n_workers : 1, optional
+        number of threads used to read recordings concurrently - each thread
+        opens its own handle to the file (hf is only used directly if 1, or if hf 
+        is not an h5py file, e.g. a zarr group)
+    open_kwargs : dict, optional
+        keyword arguments passed to open_recording when opening the handles of the 
+        threads - standard is the driver and chunk cache settings of hf (files opened
+        with the 'core' driver are read from disk by the threads, rather than loaded 
+        into memory once per thread)
     component_dict : dict
         dictionary with keys equal the names of either sensor groups or sensors, 
         and items equal the corresponding requested components
@@ -67,18 +489,44 @@ def export_from_multirec_hdf(hf, rec_names, **kwargs):
 
     if rec_names == 'all':
         rec_names = list(hf.keys())
-        
-    df_full = pd.DataFrame()
-    
-    for rec_name in rec_names:
-        df = export_from_hdf(hf[rec_name], return_as='dataframe', **kwargs)
+
+    def export_rec(hf_rec):
+        df = export_from_hdf(hf_rec, return_as='dataframe', **kwargs)
 
         if 't' in df:
-            df['t'] = pd.to_datetime(hf[rec_name].attrs['starttime']) + pd.to_timedelta(df['t'], unit='s')
-            
-        df_full = df_full.append(df)
+            starttime = pd.Timestamp(hf_rec.attrs['starttime'])
+            t_ns = starttime.value + np.round(df['t'].to_numpy()*1e9).astype(np.int64)
+            t = pd.DatetimeIndex(t_ns.view('datetime64[ns]'))
 
-    if 't' in df:
+            if starttime.tz is not None:
+                t = t.tz_localize('UTC').tz_convert(starttime.tz)
+
+            df['t'] = t
+
+        return df
+
+    if open_kwargs is None and isinstance(hf, h5py.File):
+        _, rdcc_nslots, rdcc_nbytes, rdcc_w0 = hf.id.get_access_plist().get_cache()
+        open_kwargs = dict(rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots, rdcc_w0=rdcc_w0)
+        if hf.driver != 'core':
+            open_kwargs['driver'] = hf.driver
+
+    def export_rec_from_file(rec_name):
+        with open_recording(hf.filename, **open_kwargs) as hf_worker:
+            return export_rec(hf_worker[rec_name])
+
+    if n_workers > 1 and len(rec_names) > 1 and isinstance(hf, h5py.File):
+        with ThreadPoolExecutor(max_workers=min(len(rec_names), n_workers)) as executor:
+            frames = list(executor.map(export_rec_from_file, rec_names))
+    else:
+        frames = [export_rec(hf[rec_name]) for rec_name in rec_names]
+
+    if len(frames) == 0:
+        return pd.DataFrame()
+
+    df_full = pd.concat(frames, ignore_index=True)
+
+    if 't' in df_full:
         df_full = df_full.set_index('t')
         
     return df_full
@@ -86,21 +534,25 @@ def export_from_multirec_hdf(hf, rec_names, **kwargs):
 def export_from_hdf(hf_recording, component_dict=None, 
                     lookup_sensor_groups=True,
                     return_as='dataframe', decimation_factor=1,
-                    level_separator='/', return_t=True, name_from=None):
+                    level_separator='/', return_t=True, name_from=None, dtype=None):
     """
     Export data from recording established from h5py.
         
     Arguments
     ---------------------------
     hf_recording : obj
-        object from h5py representing the recording (if multiple recs in same file, hf['my_rec_name'])
+        object from h5py representing the recording (if multiple recs in same file, hf['my_rec_name']),
+        or the corresponding zarr group
     component_dict : dict
         dictionary with keys equal the names of either sensor groups or sensors, 
         and items equal the corresponding requested components
     lookup_sensor_groups : True, optional
         specifying if sensor _groups_ are used in component_dict - if False sensor names are used
     return_as : 'dataframe', optional
-        how to return data - valid options are 'dataframe', 'array', 'dict'
+        how to return data - valid options are 'dataframe', 'array', 'dict', 'lazy' 
+        ('array' returns a Recording namedtuple with fields data (2d array with one column 
+        per component), columns, t and samplerate; 'lazy' returns a LazyRecording reading 
+        each component on first access, which requires the h5 file to stay open)
     decimation_factor : 1, optional
         integer defining the decimation wanted for data retrieval (every n-th sample)
     level_separator : '/', optional
@@ -109,61 +561,123 @@ def export_from_hdf(hf_recording, component_dict=None,
         whether or not to return time axis
     name_from : str, default=None
         name of sensor from given attribute of sensor group (if None, the original name is used)
+    dtype : None, optional
+        numpy dtype to convert data to while reading (e.g. np.float32 to halve memory
+        use, accepting the loss of precision) - standard keeps the stored dtype
 
 
     Returns
     ---------------------------
     output
-        pandas dataframe, dictionary or array depending on input of return_as
+        pandas dataframe, dictionary, Recording or LazyRecording depending on input of return_as
     """
     
     ds = decimation_factor
     
-    def get_valid_components():
-        if lookup_sensor_groups:
-            check_val = sensor_group + ''
-        else:
-            check_val = sensor + ''
-      
-        if type(component_dict) is dict:
-            if check_val in component_dict:
-                return list(component_dict[check_val])
-            else:
-                return []
-        elif component_dict is None:
-            return components
-        else:
-            raise ValueError('Wrong format. Use None or dict as input for sensors_and_components.')
+    if type(component_dict) is dict:
+        requested = {key: tuple(comps) for key, comps in component_dict.items()}
+    elif component_dict is None:
+        requested = None
+    else:
+        raise ValueError('Wrong format. Use None or dict as input for sensors_and_components.')
     
-    sensor_data = dict()
-    sensor_groups = list(hf_recording.keys())
-    for sensor_group in sensor_groups:
-        sensors_in_group = list(hf_recording[sensor_group].keys())
+    if isinstance(hf_recording, h5py.Group):
+        cache_nbytes = hf_recording.file.id.get_access_plist().get_cache()[2]
+    else:
+        cache_nbytes = None         # zarr group, no HDF5 chunk cache
+    cache_warned = False
 
-        for sensor in sensors_in_group:
-            components = list(hf_recording[sensor_group][sensor].keys())
+    if return_as not in ['array', 'dataframe', 'dict', 'lazy']:
+        raise ValueError('Use "array", "dataframe", "dict" or "lazy" as value for return_as')
 
-            for c in get_valid_components():
-                if name_from is not None:
-                    sensor_name = hf_recording[sensor_group][sensor].attrs[name_from]
-                else:
-                    sensor_name = sensor+''
+    # zarr does not keep member order - sort by name as h5py does
+    keys_of = list if isinstance(hf_recording, h5py.Group) else sorted
+
+    columns = dict()
+    for sensor_group in keys_of(hf_recording):
+        group = hf_recording[sensor_group]
+
+        for sensor in keys_of(group):
+            sensor_obj = group[sensor]
+
+            if requested is None:
+                valid_components = keys_of(sensor_obj)
+            elif lookup_sensor_groups:
+                valid_components = requested.get(sensor_group, ())
+            else:
+                valid_components = requested.get(sensor, ())
 
-                sc = f'{sensor_name}{level_separator}{c}'
-                sensor_data[sc] = hf_recording[sensor_group][sensor][c][::ds]
+            if len(valid_components) == 0:
+                continue
+
+            if name_from is not None:
+                sensor_name = sensor_obj.attrs[name_from]
+            else:
+                sensor_name = sensor+''
+
+            for c in valid_components:
+                dset = sensor_obj[c]
+                columns[f'{sensor_name}{level_separator}{c}'] = dset
+
+                if cache_nbytes is not None and not cache_warned and dset.chunks is not None and np.prod(dset.chunks)*dset.dtype.itemsize > cache_nbytes:
+                    warnings.warn(f'Chunks of {dset.name} are larger than the chunk cache ({cache_nbytes} bytes). '
+                                  'Consider opening the file with open_recording and a larger rdcc_nbytes.')
+                    cache_warned = True
     
-    if 'samplerate' in hf_recording.attrs and 'duration' in hf_recording.attrs and return_t: #global sample rate
-        sensor1 = list(sensor_data.keys())[0]  
-        sensor_data['t'] = np.linspace(0, hf_recording.attrs['duration'], len(sensor_data[sensor1]))
+    global_t = 'samplerate' in hf_recording.attrs and 'duration' in hf_recording.attrs and return_t   #global sample rate
+
+    if return_as == 'lazy':
+        duration = hf_recording.attrs['duration'] if global_t else None
+        return LazyRecording(columns, decimation_factor=ds, duration=duration, dtype=dtype)
+
+    dsets = list(columns.values())
+    shapes = set(dset.shape for dset in dsets)
+    contiguous = dtype is None and all(dset.chunks is None for dset in dsets)
+    h5 = all(isinstance(dset, h5py.Dataset) for dset in dsets)
+
+    # one shared block per dtype, so that each column keeps the dtype of its dataset
+    dtype_groups = dict()
+    if h5 and len(shapes) == 1 and len(dsets[0].shape) == 1 and not contiguous:
+        for sc, dset in columns.items():
+            dtype_groups.setdefault(dset.dtype if dtype is None else dtype, []).append(sc)
+
+    block = None
+    sensor_data = dict()
+    for group_cols in dtype_groups.values():
+        if len(group_cols) > 1:
+            group_block = read_datasets([columns[sc] for sc in group_cols], ds, dtype=dtype)
+            sensor_data.update({sc: group_block[:, i] for i, sc in enumerate(group_cols)})
+            if len(group_cols) == len(columns):
+                block = group_block
+
+    sensor_data = {sc: sensor_data[sc] if sc in sensor_data else read_dataset(dset, ds, dtype=dtype) 
+                   for sc, dset in columns.items()}
+
+    if global_t:
+        n = next(iter(sensor_data.values())).shape[0]
+        t = time_axis_from_duration(n, hf_recording.attrs['duration'])
+        sensor_data['t'] = t
     
     if return_as == 'array':
-        return np.vstack(list(sensor_data.values())).T, list(sensor_data.keys())
+        if block is None:
+            cols = [sensor_data[sc] for sc in columns]
+            block = np.empty((len(cols), len(cols[0])), dtype=np.result_type(*cols))
+            for i, col in enumerate(cols):
+                block[i] = col
+            block = block.T         # contiguous columns, as from read_datasets
+
+        return Recording(data=block, columns=list(columns.keys()), t=sensor_data.get('t'), 
+                         samplerate=hf_recording.attrs.get('samplerate', None))
     elif return_as == 'dataframe':
-        return pd.DataFrame.from_dict(sensor_data)
+        if block is not None:       # keep block as backing array of dataframe
+            df = pd.DataFrame(block, columns=list(columns.keys()), copy=False)
+            if global_t:
+                df['t'] = t
+            return df
+        else:
+            return pd.DataFrame.from_dict(sensor_data)
     elif return_as == 'dict':
         return sensor_data
-    else:
-        raise ValueError('Use "array", "dataframe" or "dict" as value for return_as')
 
 
 def convert_stats(stats_dict, sensor_dict=None, fields=['mean', 'std']):
@@ -186,8 +700,7 @@ def convert_stats(stats_dict, sensor_dict=None, fields=['mean', 'std']):
         with statistics in a flattened format as items
     """
         
-    stats_df = {field: pd.DataFrame(stats_dict['recording'], 
-                                    columns=['recording']) for field in fields}
+    cols = {field: dict() for field in fields}
 
     for sensor_name in stats_dict['sensor']:
         sensor_data = stats_dict['sensor'][sensor_name]
@@ -201,10 +714,10 @@ def convert_stats(stats_dict, sensor_dict=None, fields=['mean', 'std']):
             col_name = f'{sensor_group}{sensor_name}/{comp_name}'
             
             for field in fields:   
-                stats_df[field][col_name] = sensor_data[field][:,comp_ix]
-              
-    for field in fields:
-        stats_df[field] = stats_df[field].set_index('recording')
+                cols[field][col_name] = sensor_data[field][:,comp_ix]
+    
+    recordings = pd.Index(stats_dict['recording'], name='recording')
+    stats_df = {field: pd.DataFrame(cols[field], index=recordings) for field in fields}
     
     return stats_df
 
@@ -228,14 +741,11 @@ def get_stats(hf_recording, fields=['std', 'mean']):
     sensor_dict = create_sensor_dict(hf_recording)
     stats = dict()
     
-    sensor_groups = list(hf_recording.keys())
-    
     for s in sensor_dict.keys():
         sensor = hf_recording[sensor_dict[s]][s]
         stats[s] = dict()
-        components = list(sensor.keys())
 
-        for c in components:
+        for c in sensor:
             component = sensor[c]
             stats[s][c] = dict()
             for field in fields:
@@ -251,7 +761,7 @@ def get_stats_multi(hf, fields=['mean', 'std'], rec_names=None, avoid=['.global_
     Arguments
     ---------------------------
     hf : obj
-        object from h5py representing the h5-file with multiple recordings
+        object from h5py representing the h5-file with multiple recordings (or zarr group)
     fields : ['mean', 'std'], optional
         statistical fields to import
     rec_names : str, optional
@@ -267,26 +777,31 @@ def get_stats_multi(hf, fields=['mean', 'std'], rec_names=None, avoid=['.global_
     """  
     
     if rec_names is None:
-        rec_names = list(hf.keys())
+        rec_names = list(hf.keys()) if isinstance(hf, h5py.Group) else sorted(hf.keys())
         
-    for el in list(avoid):
-        rec_names.remove(el)
-
+    rec_names = [rec_name for rec_name in rec_names if rec_name not in avoid]
+    col_ix = dict()
+    row_ixs, col_ixs = [], []
+    values = {field: [] for field in fields}
+
+    for row_ix, rec_name in enumerate(rec_names):
+        def add_stats(name, obj):
+            if hasattr(obj, 'shape'):         # h5py dataset or zarr array
+                attrs = dict(obj.attrs)
+                row_ixs.append(row_ix)
+                col_ixs.append(col_ix.setdefault(name, len(col_ix)))
+                for field in fields:
+                    values[field].append(attrs[field])
+
+        visit_items(hf[rec_name], add_stats)
+
+    index = pd.Index(rec_names, name='recording')
     stats_df = dict()
     for field in fields:
-        stats_df[field] = pd.DataFrame(rec_names, columns=['recording'])
-        
-    for ix, rec_name in enumerate(rec_names):        
-        for sensor_group in hf[rec_name]:      
-            for sensor in hf[f'{rec_name}/{sensor_group}'].keys():
-                for comp in hf[f'{rec_name}/{sensor_group}/{sensor}'].keys():
-                    col_name = f'{sensor_group}/{sensor}/{comp}'
-                    for field in fields:             
-                        stats_df[field].at[ix, col_name] = hf[f'{rec_name}/{sensor_group}/{sensor}/{comp}'].attrs[field]
-               
-    for field in fields:
-        stats_df[field] = stats_df[field].set_index('recording')
-        
+        out = np.full((len(rec_names), len(col_ix)), np.nan)
+        out[row_ixs, col_ixs] = values[field]
+        stats_df[field] = pd.DataFrame(out, index=index, columns=list(col_ix))
+
     return stats_df
 
 def load_matlab_rec(path, output_format='dataframe', name='recording'):
@@ -311,18 +826,11 @@ def load_matlab_rec(path, output_format='dataframe', name='recording'):
 
     
     def avoid_ugly(arr):
-        if arr.size is 1:
+        if arr.size == 1:
             arr = arr.flatten()[0]
 
         elif arr.dtype.name == 'object':
-            value = []
-            
-            for val in arr[0]:
-                if val.size !=0:
-                    value.append(val[0])
-                else: 
-                    value.append('N/A')
-            arr = value
+            arr = [val[0] if val.size != 0 else 'N/A' for val in arr[0]]
                     
         return arr
 
@@ -361,7 +869,7 @@ def load_matlab_rec(path, output_format='dataframe', name='recording'):
         1 #do nothing    
     elif output_format.lower() == 'dataframe' or output_format.lower() == 'df':
         recording = namedtuple('Struct', recording.keys())(*recording.values())
-        data_array = np.hstack([recording.sensor[s].data for s in recording.sensor_names])
+        data_array = np.concatenate([recording.sensor[s].data for s in recording.sensor_names], axis=1)
 
         labels = []
         for sensor in recording.sensor_names:
@@ -15,10 +15,36 @@ def datenum_to_datetime(datenum):
     Convert datenumber to datetime
     """
 
-    dt = datetime.fromordinal(int(datenum)) + timedelta(days=datenum%1) - timedelta(days = 366)
+    days = int(datenum)
+    us = round((datenum - days)*86400e6)
+    dt = datetime.fromordinal(days - 366) + timedelta(microseconds=us)
     return dt
 
 
+def datenums_to_datetime64(datenums):
+    """
+    Convert array of (Matlab) datenumbers to numpy datetime64 array
+        
+    Arguments
+    ---------------------------
+    datenums : float
+        array of datenumbers
+
+    Returns
+    ---------------------------
+    dt : obj
+        numpy array of datetime64 with microsecond resolution
+
+    """
+
+    datenums = np.asarray(datenums, dtype=np.float64)
+    days = np.floor(datenums)
+    us = np.round((datenums - days)*86400e6).astype(np.int64)
+    
+    return (np.datetime64('0001-01-01', 'us') + (days.astype(np.int64) - 367).astype('timedelta64[D]') 
+            + us.astype('timedelta64[us]'))
+
+
 def create_sensor_dict_from_groups(group_dict):
     """
     Establish sensor dictionary from sensor group dictionary
@@ -36,11 +62,7 @@ def create_sensor_dict_from_groups(group_dict):
         values equal the sensor type names (inverse of group_dict)
 
     """
-    sensor_dict = {}
-    for g in group_dict.keys():
-        sensors = group_dict[g]
-        new_dict = dict(zip(sensors, [g]*len(sensors)))
-        sensor_dict.update(new_dict)
+    sensor_dict = {s: g for g, sensors in group_dict.items() for s in sensors}
         
     return sensor_dict
 
@@ -62,15 +84,7 @@ def create_sensor_dict(hf_recording):
         values equal the sensor type names (inverse of group_dict)
 
     """
-    sensor_groups = list(hf_recording.keys())
-    sensor_dict = {}
-    
-    for g in sensor_groups:
-        sensors = list(hf_recording[g].keys())
-        g_expanded = [g]*len(sensors)
-        new_dict = dict(zip(sensors, g_expanded))
-
-        sensor_dict.update(new_dict)
+    sensor_dict = {s: g for g in hf_recording for s in hf_recording[g]}
         
     return sensor_dict
 
@@ -103,6 +117,29 @@ def filter_sensor_dict(sensor_dict, sensors='all', groups='all'):
     return sensor_dict
 
 
+def time_axis_from_duration(n, duration):
+    """
+    Create uniformly sampled time axis from 0 to duration.
+        
+    Arguments
+    ---------------------------
+    n : int
+        number of samples
+    duration : float
+        time of last sample (duration of recording)
+
+    Returns
+    ---------------------------
+    t : float
+        numpy array with n time instances
+
+    """
+    t = np.arange(n, dtype=np.float64)
+    if n > 1:
+        t *= duration/(n-1)
+
+    return t
+
 def time_axis(hf_recording, sensor_name, component=None, sensor_dict=None, starttime=0.0):
     """
     Create time axis from h5py data, from specific sensor and component.
@@ -129,10 +166,43 @@ def time_axis(hf_recording, sensor_name, component=None, sensor_dict=None, start
     """
     if sensor_dict is None:
         sensor_dict = create_sensor_dict(hf_recording)
+    sensor = hf_recording[sensor_dict[sensor_name]][sensor_name]
     if component is None:
-        component = list(hf_recording[sensor_dict[sensor_name]][sensor_name].keys())[0]
+        component = next(iter(sensor))
         
-    t =  np.linspace(0, hf_recording.attrs['duration'], len(hf_recording[sensor_dict[sensor_name]][sensor_name][component]))
+    return time_axis_from_duration(sensor[component].shape[0], hf_recording.attrs['duration'])
 
-    return t
 
+
+def time_axes(hf_recording, sensor_names, sensor_dict=None):
+    """
+    Create time axes from h5py data for multiple sensors, reading the duration only once.
+        
+    Arguments
+    ---------------------------
+    hf_recording : obj
+        object from h5py representing the recording (if multiple recs in same 
+        file, hf['my_rec_name'])
+    sensor_names : str
+        list of sensor names
+    sensor_dict : dictionary with keys equal the sensor names and values equal the 
+        sensor type names (inverse of group_dict)
+
+    Returns
+    ---------------------------
+    t : dict
+        dictionary with keys equal the sensor names and values equal numpy arrays 
+        of time instances corresponding to the first component of each sensor
+
+    """
+    if sensor_dict is None:
+        sensor_dict = create_sensor_dict(hf_recording)
+
+    duration = hf_recording.attrs['duration']
+    t = dict()
+
+    for sensor_name in sensor_names:
+        sensor = hf_recording[sensor_dict[sensor_name]][sensor_name]
+        t[sensor_name] = time_axis_from_duration(sensor[next(iter(sensor))].shape[0], duration)
+
+    return t
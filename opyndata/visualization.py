@@ -1,23 +1,100 @@
-import dash
-import dash_core_components as dcc
-import dash_html_components as html
-
-from opyndata.misc import create_sensor_dict
+from opyndata.data_import import open_recording, read_dataset, rechunk_store, visit_items
+from opyndata._kernels import welch_psd
 
 import os
-import plotly.graph_objs as go
+import functools
+import base64
+import gzip
 import numpy as np
-from flask import send_from_directory
-from scipy import signal
 
 import h5py
-import matplotlib.pyplot as plt
 
+# dash, plotly, matplotlib and scipy.signal are imported where needed, 
+# to keep import of opyndata light for users not running the dashboard
+
+
+def _import_resampler():
+    """
+    Import FigureResampler from plotly-resampler, or return None if not installed
+    """
+    try:
+        from plotly_resampler import FigureResampler
+    except ImportError:
+        return None
+    
+    return FigureResampler
+
+
+def _typed_array(a):
+    """
+    Encode numpy array as plotly.js typed array spec (binary, base64) for use in dash.Patch, 
+    which would otherwise serialize arrays as JSON lists
+    """
+    a = np.ascontiguousarray(a, dtype='<f4')
+    return {'dtype': 'f4', 'bdata': base64.b64encode(a.tobytes()).decode('ascii')}
+
+
+def _xaxis_range(relayout_data):
+    """
+    Get x-axis range from plotly relayoutData: (t0, t1) after zooming, None after autoscale/reset
+    and False if the x-axis is not affected
+    """
+    if not relayout_data:
+        return False
+    elif 'xaxis.range[0]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    elif 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    elif 'xaxis.autorange' in relayout_data:
+        return None
+    else:
+        return False
+
+
+def get_sensor_coordinates(hf_rec, coordinate_field_name='position', dtype=float):
+    """
+    Get sensor coordinates from h5py object, as one array per sensor type
+        
+    Arguments
+    ---------------------------
+    hf_rec : obj
+        object from h5py representing the recording (if multiple recs in same file, hf['my_rec_name'])
+    coordinate_field_name : 'position', optional
+        from what field should the coordinates be retrieved
+    dtype : float, optional
+        data type of coordinate arrays (e.g. np.float32 for plotting)
+
+    Returns
+    ---------------------------
+    coords : dict
+        dictionary with keys equal the sensor types/groups and values equal to 
+        numpy arrays with shape (n_sensors, 3) - sensors without coordinates are given NaNs
+    names : dict
+        dictionary with keys equal the sensor types/groups and values equal to 
+        lists with the corresponding sensor names
+
+    """
+    coords = dict()
+    names = dict()
+
+    for s_type in hf_rec:
+        group = hf_rec[s_type]
+        sensors = list(group.keys())
+        coors = np.full((len(sensors), 3), np.nan, dtype=dtype)
+        for i, s in enumerate(sensors):
+            pos = group[s].attrs.get(coordinate_field_name)
+            if pos is not None:
+                coors[i] = np.ravel(pos)
+                
+        coords[s_type] = coors
+        names[s_type] = sensors
+
+    return coords, names
 
 def plot_sensors(hf_rec, view_axis=None, sensor_type_symbols=None, 
                  sensor_type_colors=None, coordinate_field_name='position', 
                  fig=None, click_callback=None, camera=None, 
-                 ):
+                 precomputed_coords=None, precomputed_names=None, backend='plotly'):
     """
     Plot sensors in 3d space from coordinates specified in h5py object
         
@@ -39,6 +116,14 @@ def plot_sensors(hf_rec, view_axis=None, sensor_type_symbols=None,
         callback function to run when clicking sensors
     camera : obj, optional
         plotly camera object (e.g. if a consistent view is wanted)
+    precomputed_coords : dict, optional
+        sensor coordinates per sensor type, as from get_sensor_coordinates 
+        (if given together with precomputed_names, hf_rec is not read)
+    precomputed_names : dict, optional
+        sensor names per sensor type, as from get_sensor_coordinates
+    backend : 'plotly', optional
+        'plotly' or 'vispy' - the latter returns a VisPy canvas from plot_sensors_gl 
+        (for dense sensor layouts; fig, click_callback, camera and view_axis are then ignored)
 
     Returns
     ---------------------------
@@ -47,7 +132,22 @@ def plot_sensors(hf_rec, view_axis=None, sensor_type_symbols=None,
 
     """
     
-    sensor_types = list(hf_rec.keys())
+    if backend == 'vispy':
+        return plot_sensors_gl(hf_rec, sensor_type_symbols=sensor_type_symbols, 
+                               sensor_type_colors=sensor_type_colors, 
+                               coordinate_field_name=coordinate_field_name,
+                               precomputed_coords=precomputed_coords, 
+                               precomputed_names=precomputed_names)
+    elif backend != 'plotly':
+        raise ValueError("backend must be 'plotly' or 'vispy'")
+    
+    import plotly.graph_objs as go
+
+    if precomputed_coords is None or precomputed_names is None:
+        precomputed_coords, precomputed_names = get_sensor_coordinates(hf_rec, 
+                                                    coordinate_field_name=coordinate_field_name)
+
+    sensor_types = list(precomputed_coords.keys())
     
     if fig is None:
         fig = go.Figure(
@@ -69,28 +169,22 @@ def plot_sensors(hf_rec, view_axis=None, sensor_type_symbols=None,
                     
     traces = []
     for s_type in sensor_types:
-        coors = []
-        sensors = list(hf_rec[s_type].keys())
-        for s in sensors:
-            if coordinate_field_name in hf_rec[s_type][s].attrs:
-                coors.append(hf_rec[s_type][s].attrs[coordinate_field_name])
-            else:
-                coors.append([np.nan, np.nan, np.nan])
-                
-        coors = np.vstack(coors)
+        coors = precomputed_coords[s_type]
+        sensors = precomputed_names[s_type]
         
         ht = '<b>%{text}</b> <br> Position: (%{x}, %{y}, %{z})'
 
         traces.append(
             go.Scatter3d(x=coors[:,0], y=coors[:,1], z=coors[:,2], mode='markers', 
-                         name=s_type, text=sensors, hovertemplate=ht))
+                         name=s_type, text=sensors, hovertemplate=ht, 
+                         marker=dict(symbol=sensor_type_symbols[s_type])))
         
         if click_callback is not None:
-            traces[-1].on_click(click_callback(s_type, s))
+            traces[-1].on_click(click_callback(s_type, sensors[-1]))
         
     fig.add_traces(traces)    
     
-    if ~only_update_data:
+    if not only_update_data:
         if camera is None:
             if view_axis is not None:
                 vals_eye = [0,0,0]
@@ -104,9 +198,6 @@ def plot_sensors(hf_rec, view_axis=None, sensor_type_symbols=None,
                 
         fig.update_layout(scene_aspectmode='data', scene_aspectratio=dict(x=1.5, y=1.5, z=1.5),
                           scene_camera=camera)
-    
-    for i,d in enumerate(fig.data):
-        fig.data[i].marker.symbol = sensor_type_symbols[fig.data[i].name]
             
     return fig
 
@@ -138,6 +229,7 @@ def plot_sensors_2d(hf_rec, axes=[0,1], sensor_type_symbols=None,
         matplotlib figure object
 
     """
+    import matplotlib.pyplot as plt
 
     sensor_types = list(hf_rec.keys())
     
@@ -163,6 +255,72 @@ def plot_sensors_2d(hf_rec, axes=[0,1], sensor_type_symbols=None,
     
     return ax
 
+def plot_sensors_gl(hf_rec, sensor_type_symbols=None, sensor_type_colors=None, 
+                    coordinate_field_name='position', canvas=None, show=False,
+                    precomputed_coords=None, precomputed_names=None):
+    """
+    Plot sensors in 3d space with VisPy (OpenGL), suited for dense sensor layouts. 
+    Requires vispy and one of its GUI/offscreen backends.
+        
+    Arguments
+    ---------------------------
+    hf_rec : obj
+        object from h5py representing the recording (if multiple recs in same file, hf['my_rec_name'])
+    sensor_type_symbols : str, optional
+        dictionary with keys equal the sensor types/groups and values equal to the string of the symbol to use
+    sensor_type_colors : str, optional
+        dictionary with keys equal the sensor types/groups and values equal to the color (type must be valid argument in vispy)
+    coordinate_field_name : 'position', optional
+        from what field should the coordinates be retrieved
+    canvas : obj, optional
+        vispy SceneCanvas to plot the sensors in
+    show : False, optional
+        whether or not to show the canvas
+    precomputed_coords : dict, optional
+        sensor coordinates per sensor type, as from get_sensor_coordinates 
+        (if given together with precomputed_names, hf_rec is not read)
+    precomputed_names : dict, optional
+        sensor names per sensor type, as from get_sensor_coordinates
+
+    Returns
+    ---------------------------
+    canvas : obj
+        vispy SceneCanvas object (use canvas.render() to get image array)
+
+    """
+    from vispy import scene
+
+    if precomputed_coords is None or precomputed_names is None:
+        precomputed_coords, precomputed_names = get_sensor_coordinates(hf_rec, 
+                                                    coordinate_field_name=coordinate_field_name)
+
+    sensor_types = list(precomputed_coords.keys())
+
+    if sensor_type_symbols is None:
+        standard_markers = ['disc', 'cross', 'diamond', 'square', 'x']
+        sensor_type_symbols = dict(zip(sensor_types, standard_markers))
+        
+    if sensor_type_colors is None:
+        standard_colors = ['r', 'b', 'g', 'm', 'gray', 'k']
+        sensor_type_colors = dict(zip(sensor_types, standard_colors))
+
+    if canvas is None:
+        canvas = scene.SceneCanvas(keys='interactive', show=show, bgcolor='white')
+        
+    view = canvas.central_widget.add_view()
+    view.camera = 'turntable'
+
+    for s_type in sensor_types:
+        coors = precomputed_coords[s_type]
+        coors = coors[~np.isnan(coors).any(axis=1)]
+        markers = scene.visuals.Markers(parent=view.scene)
+        markers.set_data(coors, face_color=sensor_type_colors[s_type], 
+                         symbol=sensor_type_symbols[s_type], size=10)
+
+    view.camera.set_range()
+    
+    return canvas
+
 class AppSetup:
     """
     Class defining Dash application for h5 browsing.
@@ -170,72 +328,204 @@ class AppSetup:
     Arguments
     ---------------------------
     data_path : str
-        path to h5-file
+        path to h5-file, or to zarr store (path ending with .zarr, see 
+        opyndata.data_import.convert_to_zarr) for reads not serialized by the GIL
     logo_path : str, optional
         path to logo to show in dashboard - no logo is standard
     stylesheet_path : 'github', optional
         path to css for stylesheet definitions - standard value uses css from GitHub repository
     requested_stat : ['std', 'mean'], optional
         fields to retrieve in .global_stats
+    resample : False, optional
+        whether or not to downsample the time series plot to the visible range with
+        plotly-resampler (only used if plotly-resampler is installed) - the resampled 
+        figure is shared by all browser sessions, so only use this for a single user 
+        (otherwise, zooming reads the visible part of the time series for each session)
+    chunk_cache_bytes : 64*1024**2, optional
+        size of the HDF5 raw data chunk cache in bytes, keeping recently viewed 
+        time series in memory
+    metadata_cache_bytes : 32*1024**2, optional
+        initial size of the HDF5 metadata cache in bytes (max. 128 MiB)
+    mmap_threshold : 2*1024**3, optional
+        files smaller than this (in bytes) are loaded fully into memory on startup 
+        (HDF5 core driver), larger files are read from disk on demand
+    rechunk : False, optional
+        whether or not to rewrite datasets with oversized chunks in the h5-file 
+        before opening it (see opyndata.data_import.rechunk_store) - modifies the file
 
 
     """
 
     def __init__(self, data_path,
                 logo_path=None,
-                stylesheet_path='github', requested_stat=['std', 'mean']):
+                stylesheet_path='github', requested_stat=['std', 'mean'], resample=False,
+                chunk_cache_bytes=64*1024**2, metadata_cache_bytes=32*1024**2, 
+                mmap_threshold=2*1024**3, rechunk=False):
         
         self.data_path = data_path
         self.logo_path = logo_path
         self.stylesheet_path = stylesheet_path 
-        self.hf = h5py.File(data_path, 'r')
+        self.mmap_threshold = mmap_threshold
+        
+        if str(data_path).endswith('.zarr'):
+            self.hf = open_recording(data_path)
+        else:
+            if rechunk:
+                rechunk_store(data_path)
+            
+            if os.path.getsize(data_path) < self.mmap_threshold:
+                driver_kwargs = dict(driver='core', backing_store=False)
+            else:
+                driver_kwargs = dict()
+                
+            self.hf = open_recording(data_path, rdcc_nbytes=chunk_cache_bytes, rdcc_nslots=10007, 
+                                     rdcc_w0=0.75, mdc_nbytes=metadata_cache_bytes, **driver_kwargs)
         self.requested_stat = requested_stat
+        self.resample = resample and _import_resampler() is not None
+        self._window_cache = dict()      # nperseg -> Welch window
         
         
         if self.stylesheet_path == 'github':
             self.stylesheet_path = 'https://knutankv.github.io/open-bridge-data/static/style.css'
         
+        self._index_file()
+
+    def close(self):
+        """
+        Clear cached results and close the h5-file.
+        """
+        if hasattr(self, '_compute'):
+            self._compute.cache_clear()
+            self._stat_block.cache_clear()
+        self._window_cache.clear()
+        if isinstance(self.hf, h5py.File):
+            self.hf.close()
+
+    def _index_file(self):
+        """
+        Cache dataset handles, recording durations and group keys of the h5-file,
+        for use in callbacks without repeated lookups in the file.
+        """
+        # zarr does not keep member order - sort by name as h5py does
+        if isinstance(self.hf, h5py.Group):
+            keys_of = lambda group: tuple(group.keys())
+        else:
+            keys_of = lambda group: tuple(sorted(group.keys()))
+            
+        self._ds_cache = dict()          # (rec, group, sensor, component) -> dataset
+        self._group_keys = {(): keys_of(self.hf)}     # path tuple -> keys of group
+        self._durations = {rec: self.hf[rec].attrs['duration'] for rec in self.hf 
+                           if 'duration' in self.hf[rec].attrs}
+
+        def add_obj(name, obj):
+            path = tuple(name.split('/'))
+            if not hasattr(obj, 'shape'):      # group
+                self._group_keys[path] = keys_of(obj)
+            elif len(path) == 4:
+                self._ds_cache[path] = obj
+
+        visit_items(self.hf, add_obj)
+
+        self._coords = dict()           # rec -> sensor type -> (n_sensors, 3) float32 array
+        self._sensor_names = dict()     # rec -> sensor type -> sensor names
+        self._sensor_to_group = dict()  # rec -> sensor -> sensor type (as create_sensor_dict)
+        for rec in self.hf:
+            if rec[0] != '.':
+                self._coords[rec], self._sensor_names[rec] = get_sensor_coordinates(self.hf[rec], 
+                                                                                    dtype=np.float32)
+                self._sensor_to_group[rec] = {s: g for g in self._group_keys[(rec,)] 
+                                              for s in self._group_keys[(rec, g)]}
+        
     def create_app(self):
+        import dash
+        import dash_core_components as dcc
+        import dash_html_components as html
+        import plotly.graph_objs as go
+        from flask import send_from_directory, Response, abort
+        from scipy import signal
+
         # ------------ INITIALIZE LAYOUT ------------
         app = dash.Dash(__name__)
-        rec_names = list(self.hf.keys())
+        resampled_fig = _import_resampler()(go.Figure()) if self.resample else None
+        rec_names = list(self._group_keys[()])
         rec_names = [name for name in rec_names if name[0]!='.']
         
         if '.global_stats' in self.hf:
             global_stats = self.hf['.global_stats']
-            
-            field0 = list(global_stats.keys())[0]
-            sensor_types = list(global_stats[field0].keys())
-            sensor_gr0 = list(global_stats[field0].keys())[0]
-            sensor0 = list(global_stats[field0][sensor_gr0].keys())[0]
-            comp0 = list(global_stats[field0][sensor_gr0][sensor0].keys())[0]
         else:
             global_stats = {'Statistics not available':                       # rec name
                                 {'N/A':                  # sensor group
                                     {'N/A':              # sensor
                                         {'N/A': np.array([np.nan]*len(rec_names))}}}} # component
-            field0 = 'Statistics not available'
-            sensor_types = ['N/A']
-            sensor_gr0 = 'N/A'
-            sensor0 = 'N/A'
-            comp0 = 'N/A'
-            
         
-        rec0 = self.hf[rec_names[0]]
+        # field -> group -> sensor -> component names, walked once instead of in every callback
+        self._stats_keys = {field: {gr: {s: tuple(global_stats[field][gr][s].keys()) 
+                                         for s in global_stats[field][gr]} 
+                                    for gr in global_stats[field]} 
+                            for field in global_stats}
+        
+        # same structure with component sets for validation, and stat arrays (datasets) by path
+        self._stats_index = {field: {gr: {s: frozenset(comps) for s, comps in sensors.items()} 
+                                     for gr, sensors in groups.items()} 
+                             for field, groups in self._stats_keys.items()}
+        self._stats_ds = {(field, gr, s, c): global_stats[field][gr][s][c] 
+                          for field, groups in self._stats_keys.items() 
+                          for gr, sensors in groups.items() 
+                          for s, comps in sensors.items() for c in comps}
+        
+        field0 = next(iter(self._stats_keys))
+        stats_keys0 = self._stats_keys[field0]
+        sensor_types = list(stats_keys0)
+        sensor_gr0 = sensor_types[0]
+        sensor0 = next(iter(stats_keys0[sensor_gr0]))
+        comp0 = stats_keys0[sensor_gr0][sensor0][0]
+        
+        # rec -> group -> sensor names
+        self._rec_struct = {rec: {gr: self._group_keys[(rec, gr)] for gr in self._group_keys[(rec,)]}
+                            for rec in rec_names}
+        
+        # 'group' and 'group/sensor' -> names below (first stat field), for the clientside stat dropdowns
+        stats_tree = {gr: list(sensors) for gr, sensors in stats_keys0.items()}
+        stats_tree.update({f'{gr}/{s}': comps for gr, sensors in stats_keys0.items() 
+                           for s, comps in sensors.items()})
+        
+        # 'rec', 'rec/group' and 'rec/group/sensor' -> names below, for the clientside dropdowns
+        struct = {'/'.join(path): keys for path, keys in self._group_keys.items() 
+                  if 1 <= len(path) <= 3 and path[0] in rec_names}
+        
+        grp0 = self._group_keys[(rec_names[0],)]
+        sens0 = self._rec_struct[rec_names[0]][grp0[0]]
         opts0 = dict(
-            grp = list(rec0.keys()),
-            sens = list(rec0[list(rec0.keys())[0]].keys()),
-            comp = list(rec0[list(rec0.keys())[0]][list(rec0[list(rec0.keys())[0]].keys())[0]].keys())
+            grp = list(grp0),
+            sens = list(sens0),
+            comp = list(self._group_keys[(rec_names[0], grp0[0], sens0[0])])
             )            
         
-        all_fields = list(global_stats.keys())    #all fields in global stats
+        all_fields = list(self._stats_keys)    #all fields in global stats
         valid_fields = [field for field in self.requested_stat if field in all_fields]
         
+        # Sensor figure built once per recording from cached coordinates, 
+        # camera kept by client across recordings (uirevision)
+        @functools.lru_cache(maxsize=None)
+        def sensor_figure(rec):
+            fig = plot_sensors(self.hf[rec], view_axis=2, 
+                               precomputed_coords=self._coords[rec], 
+                               precomputed_names=self._sensor_names[rec])
+            fig.update_layout(uirevision='constant')
+            return fig
+        
+        # gzipped JSON of sensor figure, fetched by the browser when selecting recording
+        @functools.lru_cache(maxsize=None)
+        def sensor_figure_gz(rec):
+            return gzip.compress(sensor_figure(rec).to_json().encode(), compresslevel=6)
+
         # ------------ LAYOUT ------------
         logo_html = html.Img(src=self.logo_path, style={'width': '250px', 'margin':'1em'}) if self.logo_path else []
 
         app.layout = html.Div(className='main', children=
             [   html.Div(id='buffered_file', style={'display': 'none'}, title=''),        
+                dcc.Store(id='struct-store', data=struct),
+                dcc.Store(id='stats-tree', data=stats_tree),
                 html.Link(
                     href=self.stylesheet_path,
                     rel='stylesheet'
@@ -254,8 +544,9 @@ class AppSetup:
                                     id = 'stat-plot',
                                     figure = go.Figure(
                                         data=[
-                                            go.Scatter(x=np.arange(len(rec_names)), 
-                                                       y=global_stats[field0][sensor_gr0][sensor0][comp0][()], 
+                                            go.Scattergl(x=np.arange(len(rec_names)), 
+                                                       y=np.asarray(global_stats[field0][sensor_gr0][sensor0][comp0][()], 
+                                                                    dtype=np.float32), 
                                                        hovertext=rec_names)
                                             ],
                                         layout = go.Layout(xaxis={'title': 'Recording number'}, 
@@ -286,15 +577,15 @@ class AppSetup:
                                 
                                 dcc.Dropdown(
                                     id='sensor-dropdown-stat',
-                                    options = [{'label':name, 'value':name} for name in global_stats[field0][sensor_gr0].keys()],
-                                    value = list(global_stats[field0][sensor_gr0].keys())[0],
+                                    options = [{'label':name, 'value':name} for name in stats_keys0[sensor_gr0]],
+                                    value = sensor0,
                                 ),
                                 
         
                                 dcc.Dropdown(
                                     id='component-dropdown-stat',
-                                    options=[{'label':name, 'value':name} for name in global_stats[field0][sensor_gr0][sensor0].keys()],
-                                    value=list(global_stats[field0][sensor_gr0][sensor0].keys())[0]
+                                    options=[{'label':name, 'value':name} for name in stats_keys0[sensor_gr0][sensor0]],
+                                    value=comp0
                                 ),
 
                                 html.H4('Plot type'),
@@ -316,9 +607,10 @@ class AppSetup:
                                     id = 'sensor-data-plot',
                                     figure = go.Figure(
                                         data=[
-                                            go.Scatter(x=[], y=[])
+                                            go.Scattergl(x=[], y=[], mode='lines')
                                             ],
-                                        layout = go.Layout(xaxis={'title': 'Time [s]'}, height=300, margin=dict(l=0,r=0,t=20,b=0))
+                                        layout = go.Layout(xaxis={'title': 'Time [s]'}, yaxis={'tickformat': '.1e'}, 
+                                                           height=300, margin=dict(l=0,r=0,t=20,b=0))
                                     )
                                 ),
                             className='plot'
@@ -404,7 +696,7 @@ class AppSetup:
                         
                         dcc.Graph(
                             id = 'sensor-plot',
-                            figure = plot_sensors(self.hf[rec_names[0]], view_axis=2)
+                            figure = go.Figure()
                             )
                         
                         # ], className ='plot')
@@ -444,13 +736,41 @@ class AppSetup:
              ]
         )
         def sensor_click_fun(clickData, selected_file, sgroup, s):
-            sensor_dict = create_sensor_dict(self.hf[selected_file])
+            sensor_dict = self._sensor_to_group[selected_file]
             if clickData is not None:
                 sensor = clickData['points'][0]['text']
                 return [sensor_dict[sensor], sensor]
             else:
                 return [sgroup, s]
             
+        # Stat series of all components of recently shown fields, read into one preallocated 
+        # float32 block per field (one row per component with one value per recording) - 
+        # series of other lengths are read separately
+        stats_rows = {field: dict() for field in self._stats_keys}
+        for key, stat in self._stats_ds.items():
+            if stat.shape == (len(rec_names),):
+                rows = stats_rows[key[0]]
+                rows[key[1:]] = len(rows)
+        
+        @functools.lru_cache(maxsize=16)
+        def stat_block(f):
+            block = np.empty((len(stats_rows[f]), len(rec_names)), dtype=np.float32)
+            for key, i in stats_rows[f].items():
+                stat = self._stats_ds[(f,) + key]
+                if isinstance(stat, h5py.Dataset):
+                    stat.read_direct(block, dest_sel=np.s_[i])
+                else:
+                    block[i] = stat[...]
+            return block
+        
+        def stat_values(f, gr, s, c):
+            if (gr, s, c) in stats_rows[f]:
+                return stat_block(f)[stats_rows[f][(gr, s, c)]]
+            else:
+                return read_dataset(self._stats_ds[(f, gr, s, c)], dtype=np.float32)
+        
+        self._stat_block = stat_block
+
         # Stat plot
         @app.callback(
             dash.dependencies.Output('stat-plot', 'figure'),
@@ -465,54 +785,129 @@ class AppSetup:
             s = selected_sensor
             c = selected_component
             f = stat_quantity
+            keys = self._stats_index
               
-            if f is None or f not in global_stats:
+            if f is None or f not in keys:
                 missing = 'field'
-            elif gr is None or gr not in global_stats[f]:
+            elif gr is None or gr not in keys[f]:
                 missing = 'sensor group'  
-            elif s is None or s not in global_stats[f][gr]:
+            elif s is None or s not in keys[f][gr]:
                 missing = 'sensor'
-            elif c is None or c not in global_stats[f][gr][s]:
+            elif c is None or c not in keys[f][gr][s]:
                 missing = 'component'
             else:
                 missing = None
             
+            # new sensor group: the sensor is set clientside right after, so skip the placeholder
+            triggers = [trig['prop_id'] for trig in dash.callback_context.triggered]
+            if missing == 'sensor' and triggers == ['sensor_group-dropdown-stat.value']:
+                raise dash.exceptions.PreventUpdate
             
+            # only patch stat values of figure already shown (x-axis is always the recordings)
+            figout = dash.Patch()
             if missing is None:
-                y = global_stats[f][gr][s][c][()]
-                
-                figout = go.Figure(
-                                        data=[
-                                            go.Scatter(x=np.arange(len(rec_names)), y=y, hovertext=rec_names)
-                                            ],
-                                        layout = go.Layout(xaxis={'title': 'Recording number'},  yaxis={'tickformat': '.1e'})
-                                    )
-                figout.update_layout(height=300, margin=dict(l=0,r=0,t=20,b=0))
+                figout['data'][0]['y'] = _typed_array(stat_values(f, gr, s, c))
+                figout['layout']['annotations'] = []
             else:
-                figout = go.Figure(data=[go.Scatter(x=None, y=None)])
-                figout.add_annotation(x=0.5, y=0.5,
-                      text=f'Please select {missing}...',
-                      showarrow=False)
+                figout['data'][0]['y'] = []
+                figout['layout']['annotations'] = [dict(x=0.5, y=0.5, xref='paper', yref='paper', 
+                                                        text=f'Please select {missing}...', 
+                                                        showarrow=False)]
+            figout['layout']['yaxis']['autorange'] = True
+            
             return figout
 
 
-        # Sensor plot        
-        @app.callback(
-            dash.dependencies.Output('sensor-plot', 'figure'),        # output from next function
-            dash.dependencies.Input('file-dropdown', 'value'),
-            dash.dependencies.State('sensor-plot', 'figure'))      # specified input given to next function
-
-        def update_sensor_figure(selected_file, fig):
-            
-            if fig is not None:        
-                fig['data'] = []
-                fig = go.Figure(**fig)
-                fig = plot_sensors(self.hf[selected_file], fig=fig)
-                
-            return fig
+        # Sensor plot (figure JSON fetched from route below, not inlined in layout/callback)
+        app.clientside_callback(
+            """
+            function(f) {
+                if (!f) {
+                    return window.dash_clientside.no_update;
+                }
+                return fetch('%s' + encodeURIComponent(f)).then(r => r.json());
+            }
+            """ % app.get_relative_path('/_sensor-figure/'),
+            dash.dependencies.Output('sensor-plot', 'figure'),
+            dash.dependencies.Input('file-dropdown', 'value')
+            )
+        
+        @app.server.route(app.config.routes_pathname_prefix + '_sensor-figure/<rec>')
+        def sensor_figure_route(rec):
+            if rec not in rec_names:
+                abort(404)
+            response = Response(sensor_figure_gz(rec), mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+            response.headers['Cache-Control'] = 'max-age=3600'
+            return response
            
                         
-        # Time series plot
+        # Time series (samples i0 to i1) as (x, y), None if NaNs prevent detrending - float32
+        # is sufficient on screen and halves the payload sent to the browser
+        def time_series(selected_file, gr, s, c, detrend, i0=0, i1=None):
+            ds = self._ds_cache[(selected_file, gr, s, c)]
+            n = ds.shape[0]
+            dt = self._durations[selected_file]/(n-1)
+            if i1 is None:
+                i1 = n
+            
+            # trend is fitted to full record: slice cached detrended series when zoomed
+            if detrend and (i0, i1) != (0, n):
+                xy = compute(selected_file, gr, s, c, True, 'time', None, None)
+                return None if xy is None else (xy[0][i0:i1], xy[1][i0:i1])
+            
+            if (i0, i1) == (0, n):
+                y = read_dataset(ds)
+            else:
+                y = ds[i0:i1]
+                
+            if detrend:
+                if np.any(np.isnan(y)):
+                    return None
+                y = signal.detrend(y)
+            
+            x = np.arange(i0, i1, dtype=np.float32)
+            x *= np.float32(dt)
+            return x, np.ascontiguousarray(y, dtype=np.float32)
+        
+        # Full time series or Welch estimate of recently shown components, as float32 (x, y)
+        # None if NaNs are present (freq. domain or detrended time series)
+        @functools.lru_cache(maxsize=32)
+        def compute(selected_file, gr, s, c, detrend, domain, nfft, zp):
+            if domain != 'freq':
+                return time_series(selected_file, gr, s, c, detrend)
+            
+            ds = self._ds_cache[(selected_file, gr, s, c)]
+            # mean removed in double precision, so that offsets do not eat the float32 mantissa
+            y = read_dataset(ds)
+            y = (y - np.mean(y, dtype=np.float64)).astype(np.float32)
+            if np.any(np.isnan(y)):
+                return None
+            
+            n = ds.shape[0]
+            fs = (n-1)/self._durations[selected_file]
+            nperseg = min(2**(nfft+6), n)
+            if nperseg not in self._window_cache:
+                self._window_cache[nperseg] = signal.get_window('hann', nperseg).astype(np.float32)
+
+            f, p = welch_psd(y, fs, self._window_cache[nperseg], nfft=zp*2**(nfft+6), workers=-1)
+            return f.astype(np.float32), p.astype(np.float32, copy=False)
+        
+        self._compute = compute
+
+        # Time series plot (zoom handled by resampler if used, else by update_figure)
+        if resampled_fig is None:
+            relayout_dependency = dash.dependencies.Input
+        else:
+            relayout_dependency = dash.dependencies.State
+        
+        # Empty figure with message, reused when resampler is used (messages are few)
+        @functools.lru_cache(maxsize=None)
+        def message_figure(message):
+            figout = go.Figure(data=[go.Scattergl(x=None, y=None)])
+            figout.add_annotation(x=0.5, y=0.5, text=message, showarrow=False)
+            return figout
+            
         @app.callback(
             dash.dependencies.Output('sensor-data-plot', 'figure'),        # output from next function
             [dash.dependencies.Input('sensor_group-dropdown', 'value'),
@@ -522,149 +917,174 @@ class AppSetup:
             dash.dependencies.Input('detrend-checkbox', 'value'),
             dash.dependencies.Input('psd-radio', 'value'),
             dash.dependencies.Input('nfft-slider', 'value'),
-            dash.dependencies.Input('zp-slider', 'value')])      # specified input given to next function
+            dash.dependencies.Input('zp-slider', 'value'),
+            relayout_dependency('sensor-data-plot', 'relayoutData')])      # specified input given to next function
 
         def update_figure(selected_group, selected_sensor, selected_component, 
-                          selected_file, detrend_state, domain, nfft, zp):
+                          selected_file, detrend_state, domain, nfft, zp, relayout_data):
+            # zooming without resampler: read only the visible part of the time series
+            t_range = None
+            triggers = [trig['prop_id'] for trig in dash.callback_context.triggered]
+            if resampled_fig is None and triggers == ['sensor-data-plot.relayoutData']:
+                t_range = _xaxis_range(relayout_data)
+                if domain == 'freq' or t_range is False:
+                    raise dash.exceptions.PreventUpdate
+                
             gr = selected_group
             s = selected_sensor
             c = selected_component
 
-            selected_hf = self.hf[selected_file]
+            keys = self._group_keys
             
-            if gr is None or gr not in selected_hf:
+            # valid component paths are the keys of the dataset cache
+            if (selected_file, gr, s, c) in self._ds_cache:
+                missing = None
+            elif gr is None or gr not in keys.get((selected_file,), ()):
                 missing = 'sensor group'
-            elif s is None or s not in selected_hf[gr]:
+            elif s is None or s not in keys[(selected_file, gr)]:
                 missing = 'sensor'
-            elif c is None or c not in selected_hf[gr][s]:
-                missing = 'component'
             else:
-                missing = None
+                missing = 'component'
             
             
             if missing is None:
-                y = selected_hf[gr][s][c][()]
-        
-                if np.any(np.isnan(y)) and (detrend_state or domain=='freq'):
-                    figout = go.Figure(data=[go.Scatter(x=None, y=None)])
-                    figout.add_annotation(x=0.5, y=0.5,
-                        text='NaNs detected - reduce post-processing',
-                        showarrow=False)   
-                else:     
-                    t_max = selected_hf.attrs['duration']
-                    n = len(y)
-                    x = np.linspace(0, t_max, n)
-        
-                    if detrend_state:
-                        y = signal.detrend(y)
-        
-                    if domain == 'freq':
-                        fs = 1/(x[1]-x[0])
-                        x, y = signal.welch(signal.detrend(y), fs, nperseg=2**(nfft+6), nfft=zp*2**(nfft+6))
-                        layout = go.Layout(xaxis={'title': 'Frequency [Hz]'}, yaxis={'tickformat': '.1e'})
-                    else:
-                        layout = go.Layout(xaxis={'title': 'Time [s]'}, yaxis={'tickformat': '.1e'})
-        
-                    figout = go.Figure(
-                                data=[
-                                    go.Scatter(x=x, y=y
-                                    )
-                                ],
-                                layout = layout
-                                )
-                    figout.update_layout(height=300, margin=dict(l=0,r=0,t=20,b=0))
-                   
+                if t_range is not None:
+                    n = self._ds_cache[(selected_file, gr, s, c)].shape[0]
+                    dt = self._durations[selected_file]/(n-1)
+                    i0 = min(max(int(np.floor(t_range[0]/dt)), 0), n-2)
+                    i1 = max(min(int(np.ceil(t_range[1]/dt))+1, n), i0+2)
+                    xy = time_series(selected_file, gr, s, c, bool(detrend_state), i0, i1)
+                elif domain == 'freq':
+                    xy = compute(selected_file, gr, s, c, None, domain, nfft, zp)
+                else:
+                    xy = compute(selected_file, gr, s, c, bool(detrend_state), domain, None, None)
+                    
+                message = 'NaNs detected - reduce post-processing' if xy is None else None
             else:
+                message = f'Please select {missing}...'
                 
-                figout = go.Figure(data=[go.Scatter(x=None, y=None)])
-                figout.add_annotation(x=0.5, y=0.5,
-                    text=f'Please select {missing}...',
-                    showarrow=False)
-
+            xtitle = 'Frequency [Hz]' if domain == 'freq' else 'Time [s]'
+                
+            if resampled_fig is not None:
+                if message is None:       # only send points visible at current zoom
+                    x, y = xy
+                    resampled_fig.replace(go.Figure(layout=go.Layout(xaxis={'title': xtitle}, 
+                                                                     yaxis={'tickformat': '.1e'})))
+                    resampled_fig.add_trace(go.Scattergl(mode='lines', name=c), hf_x=x, hf_y=y)
+                    figout = resampled_fig
+                    figout.update_layout(height=300, margin=dict(l=0,r=0,t=20,b=0))
+                else:
+                    figout = message_figure(message)
+                    
+                return figout
+            
+            # without resampler: only patch trace data and axis of figure already shown
+            figout = dash.Patch()
+            if message is None:
+                x, y = xy
+                figout['data'][0]['x'] = _typed_array(x)
+                figout['data'][0]['y'] = _typed_array(y)
+                figout['data'][0]['name'] = c
+                figout['layout']['annotations'] = []
+            else:
+                figout['data'][0]['x'] = []
+                figout['data'][0]['y'] = []
+                figout['layout']['annotations'] = [dict(x=0.5, y=0.5, xref='paper', yref='paper', 
+                                                        text=message, showarrow=False)]
+            
+            figout['layout']['xaxis']['title']['text'] = xtitle
+            if t_range is None:
+                figout['layout']['xaxis']['autorange'] = True
+            else:
+                figout['layout']['xaxis']['range'] = t_range
+                figout['layout']['xaxis']['autorange'] = False
+            figout['layout']['yaxis']['autorange'] = True
+            
             return figout
         
+        if resampled_fig is not None:
+            resampled_fig.register_update_graph_callback(app=app, graph_id='sensor-data-plot')
         
-        
-        #%% STATISTICS DROPDOWN
+        #%% STATISTICS DROPDOWN (clientside, looked up in stats-tree)
         # Sensor group --> sensors
-        @app.callback(
-            dash.dependencies.Output('sensor-dropdown-stat', 'value'),       # output from next function
-            [dash.dependencies.Input('sensor_group-dropdown-stat', 'value')])      # specified input given to next function
-        def update_sensor_dropdown_value_stat(selected_group):
-            updated_sensor_value = list(list(global_stats.values())[0][selected_group].keys())[0]
-            return updated_sensor_value
+        app.clientside_callback(
+            """
+            function(gr, s, tree) {
+                if (!(gr in tree) || tree[gr][0] === s) {
+                    return window.dash_clientside.no_update;
+                }
+                return tree[gr][0];
+            }
+            """,
+            dash.dependencies.Output('sensor-dropdown-stat', 'value'),
+            dash.dependencies.Input('sensor_group-dropdown-stat', 'value'),
+            dash.dependencies.State('sensor-dropdown-stat', 'value'),
+            dash.dependencies.State('stats-tree', 'data')
+            )
 
-        @app.callback(
-            dash.dependencies.Output('sensor-dropdown-stat', 'options'),       # output from next function
-            [dash.dependencies.Input('sensor_group-dropdown-stat', 'value')])      # specified input given to next function
-        def update_sensor_dropdown_stat(selected_group):
-            valid_opts = list(list(global_stats.values())[0][selected_group].keys())
-            updated_sensor_options = [{'label':name, 'value':name} for name in valid_opts]            
-            return updated_sensor_options
+        app.clientside_callback(
+            """
+            function(gr, tree) {
+                return (tree[gr] || []).map(n => ({label: n, value: n}));
+            }
+            """,
+            dash.dependencies.Output('sensor-dropdown-stat', 'options'),
+            dash.dependencies.Input('sensor_group-dropdown-stat', 'value'),
+            dash.dependencies.State('stats-tree', 'data')
+            )
         
         # Sensor --> component
-        @app.callback(
-            dash.dependencies.Output('component-dropdown-stat', 'options'),       # output from next function
-            [dash.dependencies.Input('sensor_group-dropdown-stat', 'value'),
-             dash.dependencies.Input('sensor-dropdown-stat', 'value')])      # specified input given to next function
-        def update_component_dropdown_stat(selected_group, selected_sensor):
-            valid_opts = list(list(global_stats.values())[0][selected_group][selected_sensor].keys())
-            updated_component_options = [{'label':name, 'value':name} for name in valid_opts]            
-            return updated_component_options
+        app.clientside_callback(
+            """
+            function(gr, s, tree) {
+                return (tree[[gr, s].join('/')] || []).map(n => ({label: n, value: n}));
+            }
+            """,
+            dash.dependencies.Output('component-dropdown-stat', 'options'),
+            dash.dependencies.Input('sensor_group-dropdown-stat', 'value'),
+            dash.dependencies.Input('sensor-dropdown-stat', 'value'),
+            dash.dependencies.State('stats-tree', 'data')
+            )
 
-        #%% TIME SERIES DROPDOWN
+        #%% TIME SERIES DROPDOWN (clientside, looked up in struct-store)
         # File --> sensor groups
-        @app.callback(
-             dash.dependencies.Output('sensor_group-dropdown', 'options'),
-             dash.dependencies.Input('file-dropdown', 'value')
+        app.clientside_callback(
+            """
+            function(f, struct) {
+                return (struct[f] || []).map(n => ({label: n, value: n}));
+            }
+            """,
+            dash.dependencies.Output('sensor_group-dropdown', 'options'),
+            dash.dependencies.Input('file-dropdown', 'value'),
+            dash.dependencies.State('struct-store', 'data')
             )
-             
-        def update_group_dropdown(selected_file):
-            selected_hf = self.hf[selected_file]
-            opts = [{'label':name, 'value':name} for name in list(selected_hf.keys())]    
-            return opts
         
         # Sensor group + file --> sensors
-        @app.callback(
-            dash.dependencies.Output('sensor-dropdown', 'options'),       # output from next function
+        app.clientside_callback(
+            """
+            function(f, gr, struct) {
+                return (struct[[f, gr].join('/')] || ['']).map(n => ({label: n, value: n}));
+            }
+            """,
+            dash.dependencies.Output('sensor-dropdown', 'options'),
             dash.dependencies.Input('file-dropdown', 'value'),
-            dash.dependencies.Input('sensor_group-dropdown', 'value')
-            )      # specified input given to next function
-        def update_sensor_dropdown(selected_file, selected_group):
-            selected_hf = self.hf[selected_file]
-            
-            if selected_group not in selected_hf:
-                valid_opts = ['']
-            else:
-                valid_opts = list(selected_hf[selected_group].keys())
-                
-            updated_sensor_options = [{'label':name, 'value':name} for name in valid_opts]            
-            return updated_sensor_options
+            dash.dependencies.Input('sensor_group-dropdown', 'value'),
+            dash.dependencies.State('struct-store', 'data')
+            )
 
         # Sensor group + file + sensor --> component
-        @app.callback(
-            dash.dependencies.Output('component-dropdown', 'options'), # output from next function
+        app.clientside_callback(
+            """
+            function(f, gr, s, struct) {
+                return (struct[[f, gr, s].join('/')] || ['']).map(n => ({label: n, value: n}));
+            }
+            """,
+            dash.dependencies.Output('component-dropdown', 'options'),
             dash.dependencies.Input('file-dropdown', 'value'), 
             dash.dependencies.Input('sensor_group-dropdown', 'value'),
-            dash.dependencies.Input('sensor-dropdown', 'value'))      # specified input given to next function
-        
-        def update_component_dropdown(selected_file, selected_group, selected_sensor):
-            selected_hf = self.hf[selected_file]
-                        
-            if selected_group not in selected_hf:
-                valid_opts = ['']
-            
-            elif selected_sensor not in selected_hf[selected_group]:
-                valid_opts = ['']
-            
-            else:
-                valid_opts = list(selected_hf[selected_group][selected_sensor].keys())
-            
-            updated_component_options = [{'label':name, 'value':name} for name in valid_opts]   
-  
-            return updated_component_options
-        
-        
+            dash.dependencies.Input('sensor-dropdown', 'value'),
+            dash.dependencies.State('struct-store', 'data')
+            )
 
         @app.server.route('/static/<recpath>')
         def static_file(recpath):
@@ -13,7 +13,8 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/knutankv/opyndata",
     packages=setuptools.find_packages(),
-    install_requires=['numpy', 'scipy', 'pandas', 'matplotlib', 'h5py', 'dash', 'plotly', 'datetime', 'flask'],
+    install_requires=['numpy', 'scipy', 'pandas', 'matplotlib', 'h5py', 'dash>=2.9', 'plotly>=6', 'datetime', 'flask'],
+    extras_require={'resampler': ['plotly-resampler'], 'zarr': ['zarr>=3'], 'vispy': ['vispy'], 'orjson': ['orjson']},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",